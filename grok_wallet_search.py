@@ -6,17 +6,25 @@ Searches Twitter/X for wallet addresses and extracts usernames with confidence s
 
 import os
 import re
+import string
 import asyncio
 import time
+import signal
 import logging
 import json
 import tempfile
+import hashlib
+import sqlite3
+import threading
+import concurrent.futures
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
 from datetime import datetime
-from collections import deque
 from dotenv import load_dotenv
 import gspread
 from google.oauth2.service_account import Credentials
-from xai_sdk import Client
+from xai_sdk import AsyncClient
 from xai_sdk.chat import user
 from xai_sdk.tools import x_search
 
@@ -27,6 +35,13 @@ try:
 except ImportError:
     GRPC_AVAILABLE = False
 
+# Use orjson for JSON parsing/serialization when installed (falls back to the stdlib json module)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
@@ -38,104 +53,569 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns for parsing GROK responses
+_USERNAME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'username[:\s]+@?([A-Za-z0-9_]{1,15})',  # "username: @handle" or "username: handle"
+    r'@([A-Za-z0-9_]{1,15})',  # Just @handle
+    r'handle[:\s]+@?([A-Za-z0-9_]{1,15})',  # "handle: @username"
+    r'twitter[:\s]+@?([A-Za-z0-9_]{1,15})',  # "twitter: @username"
+))
+# Character sets for per-row validation (set lookups instead of a regex per call)
+_USERNAME_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+# Placeholder cells that are obviously not a wallet (compared case-insensitively)
+_WALLET_PLACEHOLDERS = frozenset({"n/a", "na", "none", "null", "-", "--", "tbd", "unknown"})
+
+def is_valid_username(username):
+    """Check an X handle: 1-15 letters, digits or underscores"""
+    return 1 <= len(username) <= 15 and _USERNAME_CHARS.issuperset(username)
+
+def is_valid_wallet(wallet):
+    """Reject placeholder cells (e.g. "N/A") before spending a GROK call on them
+    
+    Anything else is searched as-is, including ENS names and address formats of any length.
+    """
+    return wallet.lower() not in _WALLET_PLACEHOLDERS
+
+# Confidence keywords, one named group per level (checked in priority order), plus explicit
+# "Confidence: <level>" / "Level: <level>" labels. The label value is only looked ahead at,
+# so it is still matched as a keyword and one finditer pass covers both formats.
+_CONFIDENCE_RE = re.compile(
+    r'\b(?:(?P<high>high|strong|clear|definite|certain)'
+    r'|(?P<medium>medium|moderate|somewhat|partial)'
+    r'|(?P<low>low|weak|minimal|uncertain)'
+    r'|(?P<none>none|no|false|not found))\b'
+    r'|confidence[:\s]+(?=(?P<label>high|medium|low|none|strong|moderate|weak))'
+    r'|level[:\s]+(?=(?P<level>high|medium|low|none))',
+    re.IGNORECASE
+)
+_CONFIDENCE_LEVELS = {"high": "High", "medium": "Medium", "low": "Low", "none": "None"}
+_CONFIDENCE_LABEL_LEVELS = {
+    "high": "High", "strong": "High",
+    "medium": "Medium", "moderate": "Medium",
+    "low": "Low", "weak": "Low",
+    "none": "None",
+}
+
+# First {...} block in a response, for the structured search + analysis answer
+_JSON_OBJECT_RE = re.compile(r'\{.*?\}', re.DOTALL)
+_VALID_CONFIDENCE_LEVELS = ("High", "Medium", "Low", "None")
+
+# First "true"/"false" token in Agent 1's streamed answer
+_DECISIVE_ANSWER_RE = re.compile(r'\b(true|false)\b')
+
+# String-based rate limit detection for errors that don't carry a gRPC status
+_RATE_LIMIT_RE = re.compile(r'rate.limit|429|too many requests|resource_exhausted', re.IGNORECASE)
+
+def _json_loads(data):
+    """Parse JSON from str or bytes (orjson.JSONDecodeError subclasses json.JSONDecodeError)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj):
+    """Serialize an object to UTF-8 encoded JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def is_rate_limit_error(e):
+    """Check whether an exception from the x.ai SDK is a rate limit error"""
+    # Check for gRPC RESOURCE_EXHAUSTED error
+    if GRPC_AVAILABLE:
+        code = getattr(e, 'code', None)
+        if callable(code):
+            try:
+                if code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                    return True
+            except Exception:
+                pass
+    
+    # Also check string-based detection
+    return bool(_RATE_LIMIT_RE.search(str(e)))
+
+@dataclass(frozen=True)
+class Config:
+    """Process-wide settings, parsed from the environment once at startup (see .env.example)"""
+    xai_api_key: str = field(default=None, repr=False)
+    grok_model: str = "grok-4-fast"  # Fast model for speed/cost efficiency
+    google_sheet_id: str = None
+    google_credentials_json: str = field(default=None, repr=False)
+    google_credentials_file: str = None
+    worksheet_name: str = "Gigabud Holders"
+    worksheets_to_process: tuple = ()
+    wallet_limit: int = 0  # 0 or negative = all remaining rows
+    start_from_row: int = None
+    use_parallel: bool = True
+    max_concurrent: int = 5
+    max_parallel_worksheets: int = 0  # 0 = all worksheets at once
+    io_threads: int = 4
+    rate_limit_window: int = 60
+    max_requests_per_window: int = 50
+    requests_per_second: float = 0  # 0 = derive from the window settings
+    rate_limit_burst: int = 0  # 0 = max_concurrent
+    rate_limit_delay: int = 1
+    rate_limit_error_delay: int = 60  # Seconds on rate limit error
+    checkpoint_dir: str = "/tmp"
+    result_cache_ttl_days: float = 30  # 0 disables the persistent result cache
+    negative_cache_ttl_days: float = 90
+    results_jsonl: bool = False
+    railway_environment: bool = False
+    
+    @classmethod
+    def from_env(cls):
+        """Build the configuration from environment variables (and .env)"""
+        start_from_row = os.environ.get("START_FROM_ROW")
+        if start_from_row:
+            try:
+                start_from_row = int(start_from_row)
+            except ValueError:
+                logger.warning(f"⚠️  Invalid START_FROM_ROW value: {start_from_row}. Ignoring.")
+                start_from_row = None
+        
+        worksheets_to_process = os.environ.get("WORKSHEETS_TO_PROCESS", "")
+        return cls(
+            xai_api_key=os.environ.get("xai_key") or os.environ.get("XAI_API_KEY"),
+            grok_model=os.environ.get("GROK_MODEL", "grok-4-fast"),
+            google_sheet_id=os.environ.get("GOOGLE_SHEET_ID"),
+            google_credentials_json=os.environ.get("GOOGLE_CREDENTIALS_JSON"),
+            google_credentials_file=os.environ.get("GOOGLE_CREDENTIALS_FILE"),
+            worksheet_name=os.environ.get("WORKSHEET_NAME", "Gigabud Holders"),
+            # Empty entries (e.g. from a trailing comma) are dropped
+            worksheets_to_process=tuple(w for w in (w.strip() for w in worksheets_to_process.split(",")) if w),
+            wallet_limit=int(os.environ.get("WALLET_LIMIT", "0")),
+            start_from_row=start_from_row or None,
+            use_parallel=os.environ.get("USE_PARALLEL", "true").lower() == "true",
+            max_concurrent=int(os.environ.get("MAX_CONCURRENT_REQUESTS", "5")),
+            max_parallel_worksheets=int(os.environ.get("MAX_PARALLEL_WORKSHEETS", "0")),
+            io_threads=int(os.environ.get("IO_THREADS", "4")),
+            rate_limit_window=int(os.environ.get("RATE_LIMIT_WINDOW", "60")),
+            max_requests_per_window=int(os.environ.get("MAX_REQUESTS_PER_WINDOW", "50")),
+            requests_per_second=float(os.environ.get("REQUESTS_PER_SECOND", "0")),
+            rate_limit_burst=int(os.environ.get("RATE_LIMIT_BURST", "0")),
+            rate_limit_delay=int(os.environ.get("RATE_LIMIT_DELAY", "1")),
+            rate_limit_error_delay=int(os.environ.get("RATE_LIMIT_ERROR_DELAY", "60")),
+            checkpoint_dir=os.environ.get("RAILWAY_VOLUME_MOUNT_PATH", "/tmp"),
+            result_cache_ttl_days=float(os.environ.get("RESULT_CACHE_TTL_DAYS", "30")),
+            negative_cache_ttl_days=float(os.environ.get("NEGATIVE_CACHE_TTL_DAYS", "90")),
+            results_jsonl=os.environ.get("RESULTS_JSONL", "false").lower() == "true",
+            railway_environment=bool(os.environ.get("RAILWAY_ENVIRONMENT")),
+        )
+
+def open_spreadsheet(config):
+    """Authorize with Google and open the spreadsheet (blocking; run via asyncio.to_thread)
+    
+    Args:
+        config: Config with the sheet ID and service account credentials
+    """
+    sheet_id = config.google_sheet_id
+    
+    if not sheet_id:
+        raise ValueError("GOOGLE_SHEET_ID required in environment")
+    
+    scope = [
+        'https://www.googleapis.com/auth/spreadsheets',
+        'https://www.googleapis.com/auth/drive'
+    ]
+    
+    # Check for JSON credentials in environment variable first
+    creds_json = config.google_credentials_json
+    creds_file = config.google_credentials_file
+    
+    if creds_json:
+        # Parse JSON from environment variable
+        try:
+            # Strip whitespace and try to extract JSON if there's extra content
+            creds_json = creds_json.strip()
+            
+            # Try to find JSON object if there's extra text
+            if not creds_json.startswith('{'):
+                # Look for first { and last }
+                start_idx = creds_json.find('{')
+                end_idx = creds_json.rfind('}')
+                if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
+                    creds_json = creds_json[start_idx:end_idx + 1]
+                    logger.info("⚠️  Extracted JSON from GOOGLE_CREDENTIALS_JSON (removed extra content)")
+            
+            creds_info = json.loads(creds_json)
+            creds = Credentials.from_service_account_info(creds_info, scopes=scope)
+            logger.info("✅ Using credentials from GOOGLE_CREDENTIALS_JSON environment variable")
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ JSON parse error at position {e.pos}: {e.msg}")
+            logger.error(f"   JSON content preview: {creds_json[:200]}...")
+            raise ValueError(f"Invalid JSON in GOOGLE_CREDENTIALS_JSON: {e.msg} at position {e.pos}. Please ensure the JSON is valid and properly formatted.")
+    elif creds_file:
+        # Use credentials file
+        if not os.path.exists(creds_file):
+            raise FileNotFoundError(f"Credentials file not found: {creds_file}")
+        creds = Credentials.from_service_account_file(creds_file, scopes=scope)
+        logger.info(f"✅ Using credentials from file: {creds_file}")
+    else:
+        raise ValueError("Either GOOGLE_CREDENTIALS_JSON or GOOGLE_CREDENTIALS_FILE must be set in environment")
+    
+    sheets_client = gspread.authorize(creds)
+    return sheets_client.open_by_key(sheet_id)
+
+class AdmissionController:
+    """Admission control for GROK requests: concurrency cap plus token-bucket rate limiting
+    
+    One controller is shared by every worksheet so the limits apply to the whole process.
+    Tokens refill at MAX_REQUESTS_PER_WINDOW / RATE_LIMIT_WINDOW per second, which spaces
+    requests evenly instead of releasing a burst each time a rolling window rolls over.
+    REQUESTS_PER_SECOND overrides that rate, and RATE_LIMIT_BURST caps how many requests may
+    start back to back (1 makes it a strict leaky bucket with evenly spaced requests).
+    The concurrency cap shrinks on rate-limit errors and grows back after a streak of
+    successful requests, which a plain asyncio.Semaphore cannot do safely.
+    """
+    
+    # Successful requests needed before the concurrency cap is raised again
+    GROW_AFTER_SUCCESSES = 10
+    
+    def __init__(self, max_concurrent, max_requests_per_window, rate_limit_window,
+                 requests_per_second=None, burst=None):
+        self.max_concurrent = max_concurrent
+        self.max_requests_per_window = max_requests_per_window
+        self.rate_limit_window = rate_limit_window
+        
+        # Created on first use inside the running loop (see _condition)
+        self._cond = None
+        self._active = 0  # Requests currently in flight
+        self._cmax = max_concurrent  # Current (adaptive) concurrency cap
+        self._success_streak = 0
+        
+        # Token bucket: refill rate in requests/second, burst capacity of one request per slot
+        # unless an explicit burst size is given
+        if requests_per_second:
+            self._rate = requests_per_second
+        else:
+            self._rate = max(1, max_requests_per_window) / max(1, rate_limit_window)
+        self._capacity = max(1, burst or max_concurrent)
+        self._tokens = float(self._capacity)
+        self._last_refill = time.monotonic()
+    
+    def _condition(self):
+        """Return the Condition, creating it lazily so it binds to the loop that uses it
+        
+        Searchers (and their controllers) may be constructed before the event loop starts
+        or in a worker thread via asyncio.to_thread, where no loop is running.
+        """
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+    
+    def _token_wait_time(self):
+        """Refill the bucket and return seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self._rate
+    
+    async def acquire(self):
+        """Wait until both a concurrency slot and a rate-limit token are available"""
+        cond = self._condition()
+        async with cond:
+            while True:
+                if self._active < self._cmax:
+                    wait_time = self._token_wait_time()
+                    if wait_time <= 0:
+                        break
+                    if wait_time >= 1:
+                        logger.info("   ⏳ Approaching rate limit, waiting %.1f seconds...", wait_time)
+                else:
+                    wait_time = None  # Wait for a slot to be released
+                # asyncio.timeout (not wait_for) keeps the wait in this task, so a cancellation
+                # always reacquires the lock before `async with cond` releases it
+                try:
+                    async with asyncio.timeout(wait_time):
+                        await cond.wait()
+                except TimeoutError:
+                    pass
+            
+            self._active += 1
+            self._tokens -= 1
+    
+    async def release(self):
+        """Release a concurrency slot and wake one waiter"""
+        cond = self._condition()
+        async with cond:
+            self._active -= 1
+            cond.notify(1)
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+    
+    def record_rate_limit(self, cooldown):
+        """Pause all requests for `cooldown` seconds and halve the concurrency cap
+        
+        The bucket is drained below zero so every waiter, not just the request that hit the
+        limit, stays off the API until the cooldown has been refilled. In-flight requests
+        drain naturally when the cap shrinks.
+        """
+        self._token_wait_time()
+        self._tokens = min(self._tokens, -cooldown * self._rate)
+        self._success_streak = 0
+        if self._cmax > 1:
+            self._cmax = max(1, self._cmax // 2)
+            logger.warning("   🔽 Reducing concurrent requests to %d", self._cmax)
+    
+    @classmethod
+    def from_config(cls, config):
+        """Build a controller from the concurrency and rate limit settings of a Config"""
+        return cls(
+            config.max_concurrent,
+            config.max_requests_per_window,
+            config.rate_limit_window,
+            requests_per_second=config.requests_per_second or None,
+            burst=config.rate_limit_burst or None
+        )
+    
+    async def record_success(self):
+        """Raise the concurrency cap again after a streak of successful requests"""
+        self._success_streak += 1
+        if self._cmax < self.max_concurrent and self._success_streak >= self.GROW_AFTER_SUCCESSES:
+            self._success_streak = 0
+            cond = self._condition()
+            async with cond:
+                self._cmax += 1
+                logger.info("   🔼 Increasing concurrent requests to %d", self._cmax)
+                cond.notify_all()
+
+class WalletResultCache:
+    """SQLite cache of GROK results keyed by wallet address, shared across runs and worksheets
+    
+    Methods are blocking; call them through asyncio.to_thread. A lock serializes access
+    because the connection is used from worker threads. New results are buffered and
+    committed COMMIT_EVERY at a time (and on flush/close) instead of one transaction each.
+    """
+    
+    COMMIT_EVERY = 50
+    
+    def __init__(self, db_path, ttl_seconds, negative_ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        # "No posts" answers (most wallets) rarely change, so they can be kept longer
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        # WAL lets several worksheets (connections) read and write the cache concurrently
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a power loss can drop the latest commits
+        # but never corrupts the cache
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS wallets ("
+            "wallet TEXT PRIMARY KEY, status TEXT, username TEXT, confidence TEXT, ts REAL)"
+        )
+        # Uncommitted rows, keyed by wallet: (wallet, status, username, confidence, ts)
+        self._pending = {}
+    
+    def get(self, wallet):
+        """Return the cached result for a wallet, or None if missing or older than its TTL"""
+        with self._lock:
+            pending = self._pending.get(wallet)
+            if pending is not None:
+                row = pending[1:]
+            else:
+                row = self._conn.execute(
+                    "SELECT status, username, confidence, ts FROM wallets WHERE wallet = ?",
+                    (wallet,)
+                ).fetchone()
+        if row is None:
+            return None
+        status, username, confidence, ts = row
+        ttl = self.negative_ttl_seconds if status == 'false' else self.ttl_seconds
+        if ts <= time.time() - ttl:
+            return None
+        return {'status': status, 'username': username, 'confidence': confidence}
+    
+    def put(self, wallet, result):
+        """Store a result for a wallet (committed with the next batch)"""
+        with self._lock:
+            self._pending[wallet] = (wallet, result['status'], result['username'], result['confidence'], time.time())
+            if len(self._pending) >= self.COMMIT_EVERY:
+                self._commit_pending()
+    
+    def flush(self):
+        """Commit buffered results"""
+        with self._lock:
+            self._commit_pending()
+    
+    def _commit_pending(self):
+        """Write buffered results in one transaction (caller holds the lock)"""
+        if not self._pending:
+            return
+        # The connection is in autocommit mode, so open the batch transaction explicitly
+        # (the context manager commits it, or rolls back on error)
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO wallets (wallet, status, username, confidence, ts) VALUES (?, ?, ?, ?, ?)",
+                self._pending.values()
+            )
+        self._pending.clear()
+    
+    def close(self):
+        with self._lock:
+            self._commit_pending()
+            self._conn.close()
+
 class GrokWalletSearcher:
-    def __init__(self, worksheet_name=None, shared_semaphore=None):
+    # Background Google Sheets writer: flush after this many cells or seconds, whichever comes first
+    SHEETS_FLUSH_CELLS = 50
+    SHEETS_FLUSH_INTERVAL = 2.0
+    # Checkpoint saves: after this many newly written rows or seconds, plus once when the writer stops
+    CHECKPOINT_EVERY_ROWS = 100
+    CHECKPOINT_INTERVAL = 30.0
+    # Rows fetched per Google Sheets read while streaming wallets to the workers
+    SHEETS_READ_PAGE_ROWS = 500
+    # JSONL results file: append after this many results or seconds, whichever comes first
+    RESULTS_FLUSH_LINES = 100
+    RESULTS_FLUSH_INTERVAL = 5.0
+    
+    def __init__(self, worksheet_name=None, shared_admission=None, config=None, spreadsheet=None):
         """Initialize GROK client and Google Sheets connection
         
         Args:
             worksheet_name: Name of the worksheet to process
-            shared_semaphore: Optional shared semaphore for cross-worksheet concurrency control
+            shared_admission: Optional shared AdmissionController for cross-worksheet rate limiting
+            config: Optional Config (read from the environment if not given)
+            spreadsheet: Optional shared, already opened spreadsheet (authorized here if not given)
         """
+        self.config = config = config or Config.from_env()
+        
         # Initialize x.ai client
-        api_key = os.environ.get("xai_key") or os.environ.get("XAI_API_KEY")
+        api_key = config.xai_api_key
         if not api_key:
             raise ValueError("xai_key or XAI_API_KEY not found in environment. Please add it to .env file.")
         
-        self.client = Client(api_key=api_key)
-        self.model = os.environ.get("GROK_MODEL", "grok-4-fast")  # Use fast model for speed/cost efficiency
+        # One async client per searcher, created in __aenter__ so its gRPC channel binds to the
+        # running loop; every request is multiplexed over that channel (no per-call handshakes)
+        self._api_key = api_key
+        self.client = None
+        self.model = config.grok_model
+        # Tool descriptor is immutable, build it once instead of per request
+        self.x_search_tool = x_search()
+        # Small pool for response parsing, kept apart from the event loop that drives the I/O
+        self._parse_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="grok-parse")
         
         # Worksheet name
-        self.worksheet_name = worksheet_name or os.environ.get("WORKSHEET_NAME", "Gigabud Holders")
+        self.worksheet_name = worksheet_name or config.worksheet_name
         
         # Parallel processing configuration (initialize before setup_google_sheets for logging)
-        self.max_concurrent = int(os.environ.get("MAX_CONCURRENT_REQUESTS", "5"))  # Max concurrent requests
-        # Use shared semaphore if provided (for cross-worksheet concurrency control), otherwise create new one
-        self.semaphore = shared_semaphore if shared_semaphore is not None else asyncio.Semaphore(self.max_concurrent)
+        self.max_concurrent = config.max_concurrent  # Max concurrent requests
         
-        # Initialize Google Sheets
-        self.setup_google_sheets()
+        # Use shared admission controller if provided (for cross-worksheet limits), otherwise create new one
+        if shared_admission is not None:
+            self.admission = shared_admission
+        else:
+            self.admission = AdmissionController.from_config(config)
         
         # Checkpoint file (use Railway volume path if available)
-        checkpoint_dir = os.environ.get("RAILWAY_VOLUME_MOUNT_PATH", "/tmp")
+        self.checkpoint_dir = config.checkpoint_dir
         # Create checkpoint filename based on worksheet name
         checkpoint_suffix = self.worksheet_name.lower().replace(" ", "_")
-        self.checkpoint_file = os.path.join(checkpoint_dir, f"grok_checkpoint_{checkpoint_suffix}.txt")
+        self.checkpoint_file = os.path.join(self.checkpoint_dir, f"grok_checkpoint_{checkpoint_suffix}.txt")
+        self.column_cache_file = os.path.join(self.checkpoint_dir, f"columns_{checkpoint_suffix}.json")
+        # Optional append-only log of every result, one JSON object per line
+        if config.results_jsonl:
+            self.results_file = os.path.join(self.checkpoint_dir, f"results_{checkpoint_suffix}.jsonl")
+        else:
+            self.results_file = None
+        self._results_queue = None
+        
+        # Initialize Google Sheets
+        self.setup_google_sheets(spreadsheet)
         
         # Rate limit configuration
-        self.rate_limit_delay = int(os.environ.get("RATE_LIMIT_DELAY", "1"))  # Reduced default delay
-        self.rate_limit_error_delay = int(os.environ.get("RATE_LIMIT_ERROR_DELAY", "60"))  # Seconds on rate limit error
+        self.rate_limit_delay = config.rate_limit_delay
+        self.rate_limit_error_delay = config.rate_limit_error_delay  # Seconds on rate limit error
         
         # Rate limiting tracking
-        self.request_times = deque()  # Track request timestamps
-        self.rate_limit_window = int(os.environ.get("RATE_LIMIT_WINDOW", "60"))  # 60 second window
-        self.max_requests_per_window = int(os.environ.get("MAX_REQUESTS_PER_WINDOW", "50"))  # Adjust based on tier
         self.consecutive_rate_limits = 0  # Track consecutive rate limit errors
         
-    def setup_google_sheets(self):
-        """Setup Google Sheets client"""
-        sheet_id = os.environ.get("GOOGLE_SHEET_ID")
-        
-        if not sheet_id:
-            raise ValueError("GOOGLE_SHEET_ID required in environment")
+        # Results already looked up during this run, keyed by wallet address
+        self._result_cache = {}
+        # Lookups in progress, keyed by wallet address (duplicates await the same task)
+        self._pending_lookups = {}
         
-        scope = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        # Check for JSON credentials in environment variable first
-        creds_json = os.environ.get("GOOGLE_CREDENTIALS_JSON")
-        creds_file = os.environ.get("GOOGLE_CREDENTIALS_FILE")
-        
-        if creds_json:
-            # Parse JSON from environment variable
+        # Persistent result cache across runs (RESULT_CACHE_TTL_DAYS=0 disables it)
+        cache_ttl_days = config.result_cache_ttl_days
+        negative_cache_ttl_days = config.negative_cache_ttl_days
+        self.result_cache = None
+        if cache_ttl_days > 0:
             try:
-                # Strip whitespace and try to extract JSON if there's extra content
-                creds_json = creds_json.strip()
-                
-                # Try to find JSON object if there's extra text
-                if not creds_json.startswith('{'):
-                    # Look for first { and last }
-                    start_idx = creds_json.find('{')
-                    end_idx = creds_json.rfind('}')
-                    if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                        creds_json = creds_json[start_idx:end_idx + 1]
-                        logger.info("⚠️  Extracted JSON from GOOGLE_CREDENTIALS_JSON (removed extra content)")
-                
-                creds_info = json.loads(creds_json)
-                creds = Credentials.from_service_account_info(creds_info, scopes=scope)
-                logger.info("✅ Using credentials from GOOGLE_CREDENTIALS_JSON environment variable")
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ JSON parse error at position {e.pos}: {e.msg}")
-                logger.error(f"   JSON content preview: {creds_json[:200]}...")
-                raise ValueError(f"Invalid JSON in GOOGLE_CREDENTIALS_JSON: {e.msg} at position {e.pos}. Please ensure the JSON is valid and properly formatted.")
-        elif creds_file:
-            # Use credentials file
-            if not os.path.exists(creds_file):
-                raise FileNotFoundError(f"Credentials file not found: {creds_file}")
-            creds = Credentials.from_service_account_file(creds_file, scopes=scope)
-            logger.info(f"✅ Using credentials from file: {creds_file}")
-        else:
-            raise ValueError("Either GOOGLE_CREDENTIALS_JSON or GOOGLE_CREDENTIALS_FILE must be set in environment")
+                os.makedirs(self.checkpoint_dir, exist_ok=True)
+                self.result_cache = WalletResultCache(
+                    os.path.join(self.checkpoint_dir, "grok_cache.db"),
+                    cache_ttl_days * 86400,
+                    negative_cache_ttl_days * 86400
+                )
+            except Exception as e:
+                logger.warning(f"⚠️  Could not open result cache, continuing without it: {e}")
+        
+    async def __aenter__(self):
+        """Open the x.ai client for this searcher"""
+        self.client = AsyncClient(api_key=self._api_key)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Close the x.ai client, the parse pool and the result cache"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        self._parse_pool.shutdown(wait=False)
+        if self.result_cache is not None:
+            await asyncio.to_thread(self.result_cache.close)
+            self.result_cache = None
+    
+    def setup_google_sheets(self, spreadsheet=None):
+        """Setup Google Sheets client
         
-        self.sheets_client = gspread.authorize(creds)
+        Args:
+            spreadsheet: Optional already opened gspread Spreadsheet shared across worksheets
+        """
+        if spreadsheet is None:
+            spreadsheet = open_spreadsheet(self.config)
+        sheet_id = self.config.google_sheet_id
         
-        # Open spreadsheet and worksheet
-        self.spreadsheet = self.sheets_client.open_by_key(sheet_id)
+        # Open worksheet (cheap once the spreadsheet is open)
+        self.spreadsheet = spreadsheet
         self.worksheet = self.spreadsheet.worksheet(self.worksheet_name)
         
-        # Find column indices
+        # Find column indices (reuse cached layout if the header row is unchanged)
         headers = self.worksheet.row_values(1)
+        if self.load_column_cache(sheet_id, headers):
+            logger.info("📋 Header row unchanged, using cached column layout")
+        else:
+            if self.discover_columns(headers):
+                # Columns were added, re-read so the cached layout matches the updated header row
+                headers = self.worksheet.row_values(1)
+                self.discover_columns(headers)
+            self.save_column_cache(sheet_id, headers)
+        
+        logger.info("✅ Google Sheets connected")
+        logger.info(f"   Wallet column: {self.wallet_col}")
+        logger.info(f"   Post Exist column: {self.post_exist_col}")
+        logger.info(f"   Twitter Handle column: {self.twitter_handle_col}")
+        logger.info(f"   Confidence Score column: {self.confidence_col}")
+        logger.info(f"   Script Run column: {self.script_run_col}")
+        logger.info(f"   Worksheet: {self.worksheet_name}")
+        logger.info(f"   Max concurrent requests: {self.max_concurrent}")
+    
+    def discover_columns(self, headers):
+        """Find column indices from the header row, adding missing columns
+        
+        Returns:
+            True if the worksheet header row was modified
+        """
+        modified = False
         self.wallet_col = -1
         self.post_exist_col = -1
         self.twitter_handle_col = -1
@@ -159,14 +639,17 @@ class GrokWalletSearcher:
         if self.post_exist_col == -1:
             self.worksheet.insert_cols([["Post Exist?"]], len(headers) + 1)
             self.post_exist_col = len(headers) + 1
+            modified = True
         
         if self.twitter_handle_col == -1:
             self.worksheet.insert_cols([["Twitter Handle"]], len(headers) + 2)
             self.twitter_handle_col = len(headers) + 2
+            modified = True
         
         if self.confidence_col == -1:
             self.worksheet.insert_cols([["Confidence Score"]], len(headers) + 3)
             self.confidence_col = len(headers) + 3
+            modified = True
         
         # Ensure Script Run column is at column 8
         if self.script_run_col == -1:
@@ -177,46 +660,71 @@ class GrokWalletSearcher:
                     self.worksheet.insert_cols([[""]], len(headers) + 1)
                     headers.append("")
                 self.worksheet.insert_cols([["Script Run"]], 8)
+                modified = True
             else:
                 # Column 8 exists, check if it's the script run column
                 col8_header = headers[7] if len(headers) > 7 else ""
                 if not col8_header or "script" not in col8_header.lower():
                     # Update column 8 header
                     self.worksheet.update_cell(1, 8, "Script Run")
+                    modified = True
             self.script_run_col = 8
         elif self.script_run_col != 8:
             # Script run column exists but not at column 8, update column 8
             self.worksheet.update_cell(1, 8, "Script Run")
             self.script_run_col = 8
+            modified = True
         
-        logger.info("✅ Google Sheets connected")
-        logger.info(f"   Wallet column: {self.wallet_col}")
-        logger.info(f"   Post Exist column: {self.post_exist_col}")
-        logger.info(f"   Twitter Handle column: {self.twitter_handle_col}")
-        logger.info(f"   Confidence Score column: {self.confidence_col}")
-        logger.info(f"   Script Run column: {self.script_run_col}")
-        logger.info(f"   Worksheet: {self.worksheet_name}")
-        logger.info(f"   Max concurrent requests: {self.max_concurrent}")
+        return modified
     
-    async def wait_for_rate_limit_window(self):
-        """Wait if we're approaching rate limit"""
-        now = time.time()
-        # Remove requests outside the window
-        while self.request_times and self.request_times[0] < now - self.rate_limit_window:
-            self.request_times.popleft()
-        
-        # If we're at the limit, wait
-        if len(self.request_times) >= self.max_requests_per_window:
-            wait_time = self.rate_limit_window - (now - self.request_times[0])
-            if wait_time > 0:
-                logger.info(f"   ⏳ Approaching rate limit, waiting {wait_time:.1f} seconds...")
-                await asyncio.sleep(wait_time)
-        
-        # Record this request
-        self.request_times.append(time.time())
+    def _headers_hash(self, headers):
+        """Stable hash of the header row, used to validate the column cache"""
+        return hashlib.sha256(json.dumps(headers).encode("utf-8")).hexdigest()
+    
+    def load_column_cache(self, sheet_id, headers):
+        """Load cached column indices if they were saved for this exact header row"""
+        try:
+            with open(self.column_cache_file, 'rb') as f:
+                cache = _json_loads(f.read())
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️  Error loading column cache: {e}")
+            return False
+        
+        if (cache.get('sheet_id') != sheet_id
+                or cache.get('worksheet') != self.worksheet_name
+                or cache.get('headers_hash') != self._headers_hash(headers)):
+            return False
+        
+        self.wallet_col = cache['wallet_col']
+        self.post_exist_col = cache['post_exist_col']
+        self.twitter_handle_col = cache['twitter_handle_col']
+        self.confidence_col = cache['confidence_col']
+        self.script_run_col = cache['script_run_col']
+        return True
+    
+    def save_column_cache(self, sheet_id, headers):
+        """Save column indices keyed by sheet, worksheet and header row hash"""
+        cache = {
+            'sheet_id': sheet_id,
+            'worksheet': self.worksheet_name,
+            'headers_hash': self._headers_hash(headers),
+            'wallet_col': self.wallet_col,
+            'post_exist_col': self.post_exist_col,
+            'twitter_handle_col': self.twitter_handle_col,
+            'confidence_col': self.confidence_col,
+            'script_run_col': self.script_run_col,
+        }
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            with open(self.column_cache_file, 'wb') as f:
+                f.write(_json_dumps(cache))
+        except Exception as e:
+            logger.warning(f"⚠️  Error saving column cache: {e}")
     
     async def handle_rate_limit_error(self, attempt, max_retries):
-        """Handle rate limit with exponential backoff"""
+        """Handle rate limit with exponential backoff (enforced for all requests by the admission controller)"""
         self.consecutive_rate_limits += 1
         
         # Exponential backoff: 60s, 120s, 240s (capped at 5 minutes)
@@ -227,138 +735,165 @@ class GrokWalletSearcher:
         if self.consecutive_rate_limits > 1:
             backoff_delay *= min(self.consecutive_rate_limits, 3)  # Cap multiplier at 3x
         
-        logger.warning(f"   ⚠️  Rate limit detected (attempt {attempt}/{max_retries}, consecutive: {self.consecutive_rate_limits})")
-        logger.warning(f"   ⏳ Waiting {backoff_delay} seconds (exponential backoff)...")
-        await asyncio.sleep(backoff_delay)
+        logger.warning("   ⚠️  Rate limit detected (attempt %d/%d, consecutive: %d)",
+                       attempt, max_retries, self.consecutive_rate_limits)
+        logger.warning("   ⏳ Pausing requests for %s seconds (exponential backoff)...", backoff_delay)
+        # Drains the shared token bucket, so the retry (and every other request) waits in acquire()
+        self.admission.record_rate_limit(backoff_delay)
     
     def extract_username(self, content):
         """Extract Twitter username from GROK response using regex"""
         # Try multiple patterns
-        patterns = [
-            r'username[:\s]+@?([A-Za-z0-9_]{1,15})',  # "username: @handle" or "username: handle"
-            r'@([A-Za-z0-9_]{1,15})',  # Just @handle
-            r'handle[:\s]+@?([A-Za-z0-9_]{1,15})',  # "handle: @username"
-            r'twitter[:\s]+@?([A-Za-z0-9_]{1,15})',  # "twitter: @username"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in _USERNAME_PATTERNS:
+            match = pattern.search(content)
             if match:
                 username = match.group(1)
                 # Validate username format (1-15 chars, alphanumeric + underscore)
-                if 1 <= len(username) <= 15 and re.match(r'^[A-Za-z0-9_]+$', username):
+                if is_valid_username(username):
                     return username
         
         return None
     
     def extract_confidence_level(self, content):
         """Extract confidence level from GROK response (High, Medium, Low, None)"""
-        content_lower = content.lower()
-        
-        # Look for confidence level keywords
-        if re.search(r'\b(high|strong|clear|definite|certain)\b', content_lower):
-            return "High"
-        elif re.search(r'\b(medium|moderate|somewhat|partial)\b', content_lower):
-            return "Medium"
-        elif re.search(r'\b(low|weak|minimal|uncertain)\b', content_lower):
-            return "Low"
-        elif re.search(r'\b(none|no|false|not found)\b', content_lower):
-            return "None"
-        
-        # Also check for explicit "Confidence: high/medium/low/none" format
-        confidence_patterns = [
-            r'confidence[:\s]+(high|medium|low|none)',
-            r'confidence[:\s]+(strong|moderate|weak|none)',
-            r'level[:\s]+(high|medium|low|none)',
-        ]
-        
-        for pattern in confidence_patterns:
-            match = re.search(pattern, content_lower)
-            if match:
-                level = match.group(1).lower()
-                if level in ["high", "strong"]:
-                    return "High"
-                elif level in ["medium", "moderate"]:
-                    return "Medium"
-                elif level in ["low", "weak"]:
-                    return "Low"
-                elif level == "none":
-                    return "None"
+        # Single pass over the response: a "High" keyword wins outright, otherwise the
+        # highest-priority keyword seen anywhere in the response
+        seen = set()
+        label = alt_label = level_label = None
+        for match in _CONFIDENCE_RE.finditer(content):
+            group = match.lastgroup
+            if group == "high":
+                return "High"
+            elif group == "label":
+                value = match.group("label").lower()
+                if value in ("strong", "moderate", "weak"):
+                    alt_label = alt_label or value
+                else:
+                    label = label or value
+            elif group == "level":
+                level_label = level_label or match.group("level").lower()
+            else:
+                seen.add(group)
+        for group in ("medium", "low", "none"):
+            if group in seen:
+                return _CONFIDENCE_LEVELS[group]
+        
+        # Explicit labels only decide when no keyword matched as a whole word (e.g. "Confidence: highly")
+        for value in (label, alt_label, level_label):
+            if value:
+                return _CONFIDENCE_LABEL_LEVELS[value]
         
         return None
     
     async def agent_check_post_exists(self, wallet, max_retries=3):
-        """Agent 1: Check if any post exists containing the wallet address"""
-        # Wait for rate limit window before making request
-        await self.wait_for_rate_limit_window()
+        """Agent 1: Check if any post exists containing the wallet address
         
+        Returns:
+            (True/False, response text), or (None, error message) if every attempt failed
+        """
         query = f'Search X for any posts containing the exact phrase "{wallet}". Respond with only "true" if any post exists, or "false" if no posts are found. Do not provide any other information.'
         
         for attempt in range(max_retries):
             try:
-                logger.info(f"   Agent 1 - Attempt {attempt + 1}/{max_retries}...")
+                logger.info("   Agent 1 - Attempt %d/%d...", attempt + 1, max_retries)
                 
                 # Create chat with x_search tool
-                chat = self.client.chat.create(model=self.model, tools=[x_search()])
+                chat = self.client.chat.create(model=self.model, tools=[self.x_search_tool])
                 chat.append(user(query))
                 
-                # Get response
-                response = chat.sample()
-                content = response.content.strip().lower()
+                # Stream the response and stop as soon as a decisive "true"/"false" arrives,
+                # releasing the admission slot without waiting for the rest of the answer
+                content = ""
+                decision = None
+                async with self.admission:
+                    stream = chat.stream()
+                    try:
+                        async for _, chunk in stream:
+                            content += chunk.content.lower()
+                            match = _DECISIVE_ANSWER_RE.search(content)
+                            if match:
+                                decision = match.group(1)
+                                break
+                    finally:
+                        # Closing the generator cancels the underlying gRPC stream
+                        await stream.aclose()
+                content = content.strip()
                 
                 # Reset consecutive rate limits on success
                 self.consecutive_rate_limits = 0
+                await self.admission.record_success()
                 
                 # Check for true/false
-                if "true" in content and "false" not in content:
+                if decision == "true":
                     logger.info("   ✅ Agent 1: Post exists")
                     return True, content
-                elif "false" in content:
+                elif decision == "false":
                     logger.info("   ✅ Agent 1: No posts found")
                     return False, content
                 else:
                     # Ambiguous response, default to false
-                    logger.warning(f"   ⚠️  Agent 1: Ambiguous response, defaulting to false")
+                    logger.warning("   ⚠️  Agent 1: Ambiguous response, defaulting to false")
                     return False, content
                 
             except Exception as e:
-                error_str = str(e).lower()
-                logger.error(f"   ❌ Agent 1 error on attempt {attempt + 1}: {e}")
+                logger.error("   ❌ Agent 1 error on attempt %d: %s", attempt + 1, e)
                 
-                # Check for gRPC RESOURCE_EXHAUSTED error
-                is_rate_limit = False
-                if GRPC_AVAILABLE:
-                    try:
-                        if hasattr(e, 'code') and e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
-                            is_rate_limit = True
-                    except:
-                        pass
-                
-                # Also check string-based detection
-                if not is_rate_limit and ("rate limit" in error_str or "429" in error_str or "too many requests" in error_str or "resource_exhausted" in error_str):
-                    is_rate_limit = True
-                
-                if is_rate_limit:
+                if is_rate_limit_error(e):
                     await self.handle_rate_limit_error(attempt + 1, max_retries)
                     continue
                 
                 if attempt < max_retries - 1:
                     wait_time = (attempt + 1) * 2
-                    logger.info(f"   ⏳ Waiting {wait_time} seconds before retry...")
+                    logger.info("   ⏳ Waiting %d seconds before retry...", wait_time)
                     await asyncio.sleep(wait_time)
                 else:
-                    return False, f"Error: {str(e)}"
+                    return None, f"Error: {str(e)}"
         
-        return False, "Max retries exceeded"
+        return None, "Max retries exceeded"
     
-    async def agent_analyze_ownership(self, wallet, max_retries=3):
-        """Agent 2: Analyze posts to determine wallet ownership and confidence level"""
-        # Wait for rate limit window before making request
-        await self.wait_for_rate_limit_window()
+    def parse_ownership(self, content):
+        """Regex fallback parser: extract (username, confidence level) from a free-form response"""
+        return self.extract_username(content), self.extract_confidence_level(content)
+    
+    def parse_search_result(self, content):
+        """Parse the JSON answer of the combined search + analysis call
+        
+        Returns:
+            Dict with post_exists, username and confidence, or None if the response is not valid JSON
+        """
+        match = _JSON_OBJECT_RE.search(content)
+        if not match:
+            return None
+        try:
+            data = _json_loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get('post_exists'), bool):
+            return None
+        
+        username = data.get('username')
+        if isinstance(username, str):
+            username = username.strip().lstrip('@')
+        if not username or not is_valid_username(username):
+            username = None
+        
+        confidence = data.get('confidence')
+        if isinstance(confidence, str):
+            confidence = confidence.strip().capitalize()
+        if confidence not in _VALID_CONFIDENCE_LEVELS:
+            confidence = None
         
-        query = f'''Search X for all posts containing the exact phrase "{wallet}". 
+        return {
+            'post_exists': data['post_exists'],
+            'username': username,
+            'confidence': confidence
+        }
+    
+    async def agent_search_and_analyze(self, wallet, max_retries=3):
+        """Search for posts and analyze ownership in a single GROK call with a structured JSON answer"""
+        query = f'''Search X for all posts containing the exact phrase "{wallet}".
 
-Analyze the context of each post to determine:
+If any posts exist, analyze the context of each post to determine:
 1. Who posted it (username/handle)
 2. Whether this wallet address belongs to that user (confidence level: high, medium, low, or none)
 
@@ -368,84 +903,69 @@ Confidence level guidelines:
 - "Low": Weak indication (user just mentioned or quoted it, minimal context)
 - "None": Very weak or no indication of ownership
 
-Return the username and confidence level in this format:
-Username: @handle
-Confidence: [High|Medium|Low|None]
+Respond with only a JSON object in this exact format and no other text:
+{{"post_exists": true, "username": "handle", "confidence": "High|Medium|Low|None"}}
+
+If no posts are found, respond with:
+{{"post_exists": false, "username": null, "confidence": "None"}}
 
 If multiple posts exist, analyze all of them and provide the highest confidence level with the associated username.'''
         
         for attempt in range(max_retries):
             try:
-                logger.info(f"   Agent 2 - Attempt {attempt + 1}/{max_retries}...")
+                logger.info("   Search agent - Attempt %d/%d...", attempt + 1, max_retries)
                 
                 # Create chat with x_search tool
-                chat = self.client.chat.create(model=self.model, tools=[x_search()])
+                chat = self.client.chat.create(model=self.model, tools=[self.x_search_tool])
                 chat.append(user(query))
                 
                 # Get response
-                response = chat.sample()
+                async with self.admission:
+                    response = await chat.sample()
                 content = response.content
                 
                 # Reset consecutive rate limits on success
                 self.consecutive_rate_limits = 0
+                await self.admission.record_success()
                 
-                # Extract username and confidence level
-                username = self.extract_username(content)
-                confidence_level = self.extract_confidence_level(content)
-                
-                if username:
-                    # If confidence level not found, default to "Medium"
-                    final_confidence = confidence_level if confidence_level is not None else "Medium"
-                    logger.info(f"   ✅ Agent 2: Username: @{username}, Confidence: {final_confidence}")
-                    return {
-                        'username': username,
-                        'confidence': final_confidence,
-                        'raw_response': content
-                    }
-                else:
-                    logger.warning(f"   ⚠️  Agent 2: Could not parse username from response")
-                    logger.debug(f"   Raw response: {content[:200]}...")
+                parsed = await asyncio.get_running_loop().run_in_executor(
+                    self._parse_pool, self.parse_search_result, content
+                )
+                if parsed is None:
+                    logger.warning("   ⚠️  Search agent: Could not parse JSON from response")
+                    logger.debug("   Raw response: %.200s...", content)
                     return {
+                        'post_exists': None,
                         'username': None,
-                        'confidence': confidence_level if confidence_level is not None else "Medium",
-                        'raw_response': content,
-                        'error': 'Could not parse username'
+                        'confidence': None,
+                        'raw_response': content
                     }
                 
-            except Exception as e:
-                error_str = str(e).lower()
-                logger.error(f"   ❌ Agent 2 error on attempt {attempt + 1}: {e}")
-                
-                # Check for gRPC RESOURCE_EXHAUSTED error
-                is_rate_limit = False
-                if GRPC_AVAILABLE:
-                    try:
-                        if hasattr(e, 'code') and e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
-                            is_rate_limit = True
-                    except:
-                        pass
+                parsed['raw_response'] = content
+                return parsed
                 
-                # Also check string-based detection
-                if not is_rate_limit and ("rate limit" in error_str or "429" in error_str or "too many requests" in error_str or "resource_exhausted" in error_str):
-                    is_rate_limit = True
+            except Exception as e:
+                logger.error("   ❌ Search agent error on attempt %d: %s", attempt + 1, e)
                 
-                if is_rate_limit:
+                if is_rate_limit_error(e):
                     await self.handle_rate_limit_error(attempt + 1, max_retries)
                     continue
                 
                 if attempt < max_retries - 1:
                     wait_time = (attempt + 1) * 2
-                    logger.info(f"   ⏳ Waiting {wait_time} seconds before retry...")
+                    logger.info("   ⏳ Waiting %d seconds before retry...", wait_time)
                     await asyncio.sleep(wait_time)
                 else:
                     return {
+                        'post_exists': None,
                         'username': None,
                         'confidence': None,
-                        'raw_response': '',
+                        'raw_response': f"Error: {str(e)}",
                         'error': str(e)
                     }
         
         return {
+            'post_exists': None,
             'username': None,
             'confidence': None,
             'raw_response': '',
@@ -453,68 +973,124 @@ If multiple posts exist, analyze all of them and provide the highest confidence
         }
     
     async def check_wallet(self, wallet, max_retries=3):
-        """Two-agent workflow: First check if post exists, then analyze ownership"""
-        logger.info(f"🔍 Checking wallet: {wallet[:20]}...")
+        """Look up a wallet, using the persistent result cache before calling GROK"""
+        logger.info("🔍 Checking wallet: %.20s...", wallet)
         
-        # Agent 1: Check if post exists
-        post_exists, agent1_response = await self.agent_check_post_exists(wallet, max_retries)
+        # Results from previous runs (within the TTL) skip the GROK call entirely
+        if self.result_cache is not None:
+            try:
+                cached = await asyncio.to_thread(self.result_cache.get, wallet)
+            except Exception as e:
+                logger.warning("   ⚠️  Result cache lookup failed: %s", e)
+                cached = None
+            if cached is not None:
+                logger.info("   💾 Cached result: %s", cached['status'])
+                cached['raw_response'] = ''
+                cached['cached'] = True
+                return cached
+        
+        result = await self._search_wallet(wallet, max_retries)
+        
+        # Cache clean lookups only, so failures are retried on the next run
+        if self.result_cache is not None and not result.get('error'):
+            try:
+                await asyncio.to_thread(self.result_cache.put, wallet, result)
+            except Exception as e:
+                logger.warning("   ⚠️  Result cache write failed: %s", e)
         
-        if not post_exists:
-            logger.info("   ✅ No posts found")
+        return result
+    
+    async def _search_wallet(self, wallet, max_retries=3):
+        """Search for posts and analyze ownership in one call; fall back to Agent 1 + regex parsing"""
+        search_result = await self.agent_search_and_analyze(wallet, max_retries)
+        raw_response = search_result.get('raw_response', '')
+        
+        if search_result.get('error'):
+            logger.warning("   ⚠️  Search failed: %s", search_result['error'])
             return {
                 'status': 'false',
                 'username': None,
                 'confidence': 'None',
-                'raw_response': agent1_response
+                'raw_response': raw_response,
+                'error': search_result['error']
             }
         
-        # Agent 2: Analyze ownership and confidence
-        logger.info("   🔍 Post found, analyzing ownership...")
-        ownership_result = await self.agent_analyze_ownership(wallet, max_retries)
-        
-        if ownership_result.get('username'):
-            logger.info(f"   ✅ Analysis complete! Username: @{ownership_result['username']}, Confidence: {ownership_result['confidence']}")
-            return {
-                'status': 'true',
-                'username': ownership_result['username'],
-                'confidence': ownership_result['confidence'],
-                'raw_response': ownership_result.get('raw_response', ''),
-                'agent1_response': agent1_response
-            }
+        agent1_response = None
+        if search_result['post_exists'] is None:
+            # Unstructured answer: Agent 1 decides if posts exist, regex extractors parse ownership
+            logger.info("   🔁 Falling back to Agent 1 post check...")
+            post_exists, agent1_response = await self.agent_check_post_exists(wallet, max_retries)
+            if post_exists is None:
+                # Failed lookup, not a "no posts" answer: the error keeps it out of the cache
+                logger.warning("   ⚠️  Agent 1 failed: %s", agent1_response)
+                return {
+                    'status': 'false',
+                    'username': None,
+                    'confidence': 'None',
+                    'raw_response': raw_response,
+                    'error': agent1_response
+                }
+            username, confidence_level = None, None
+            if post_exists:
+                username, confidence_level = await asyncio.get_running_loop().run_in_executor(
+                    self._parse_pool, self.parse_ownership, raw_response
+                )
         else:
-            logger.warning(f"   ⚠️  Post exists but ownership analysis failed")
+            post_exists = search_result['post_exists']
+            username = search_result['username']
+            confidence_level = search_result['confidence']
+        
+        if not post_exists:
+            logger.info("   ✅ No posts found")
             return {
-                'status': 'true',
+                'status': 'false',
                 'username': None,
-                'confidence': ownership_result.get('confidence', 'Low'),
-                'raw_response': ownership_result.get('raw_response', ''),
-                'agent1_response': agent1_response,
-                'error': ownership_result.get('error', 'Could not determine ownership')
+                'confidence': 'None',
+                'raw_response': agent1_response if agent1_response is not None else raw_response
             }
+        
+        # If confidence level not found, default to "Medium"
+        final_confidence = confidence_level if confidence_level is not None else "Medium"
+        result = {
+            'status': 'true',
+            'username': username,
+            'confidence': final_confidence,
+            'raw_response': raw_response
+        }
+        if agent1_response is not None:
+            result['agent1_response'] = agent1_response
+        
+        if username:
+            logger.info("   ✅ Analysis complete! Username: @%s, Confidence: %s", username, final_confidence)
+        else:
+            logger.warning("   ⚠️  Post exists but ownership analysis failed")
+            result['error'] = 'Could not determine ownership'
+        return result
+    
+    def column_letter(self, col):
+        """Convert a 1-based column index to its A1 letter (e.g. 8 -> 'H')"""
+        return gspread.utils.rowcol_to_a1(1, col)[:-1]
     
     def find_first_unprocessed_row(self):
         """Find the first row where Script Run column (column 8) is not 'true'"""
         try:
-            all_data = self.worksheet.get_all_values()
-            if len(all_data) < 2:
+            script_run_values = self.worksheet.col_values(self.script_run_col)
+            if len(script_run_values) < 2:
                 logger.info("📋 No data rows found, starting from row 2")
                 return 2
             
             # Check from row 2 onwards (row 1 is header)
-            for i in range(1, len(all_data)):
-                row_data = all_data[i]
-                # Check column 8 (index 7, 0-based)
-                if len(row_data) > 7:
-                    script_run_value = row_data[7].strip().lower()
-                    # If Script Run is not "true", this is the first unprocessed row
-                    if script_run_value != "true":
-                        row_number = i + 1  # Convert to 1-based row number
-                        logger.info(f"📋 Found first unprocessed row: {row_number} (Script Run = '{row_data[7]}')")
-                        return row_number
+            for i in range(1, len(script_run_values)):
+                script_run_value = script_run_values[i].strip().lower()
+                # If Script Run is not "true", this is the first unprocessed row
+                if script_run_value != "true":
+                    row_number = i + 1  # Convert to 1-based row number
+                    logger.info(f"📋 Found first unprocessed row: {row_number} (Script Run = '{script_run_values[i]}')")
+                    return row_number
             
             # All rows are processed
             logger.info("📋 All rows appear to be processed")
-            return len(all_data) + 1  # Start after last row
+            return len(script_run_values) + 1  # Start after last processed row
         except Exception as e:
             logger.warning(f"⚠️  Error finding first unprocessed row: {e}. Starting from row 2.")
             return 2
@@ -522,14 +1098,10 @@ If multiple posts exist, analyze all of them and provide the highest confidence
     def load_checkpoint(self):
         """Load checkpoint to resume from previous run"""
         # Check for explicit start row from environment variable
-        start_from_env = os.environ.get("START_FROM_ROW")
-        if start_from_env:
-            try:
-                start_row = int(start_from_env)
-                logger.info(f"📋 Using START_FROM_ROW environment variable: row {start_row}")
-                return start_row
-            except ValueError:
-                logger.warning(f"⚠️  Invalid START_FROM_ROW value: {start_from_env}. Ignoring.")
+        if self.config.start_from_row:
+            start_row = self.config.start_from_row
+            logger.info(f"📋 Using START_FROM_ROW environment variable: row {start_row}")
+            return start_row
         
         try:
             # Ensure checkpoint directory exists
@@ -549,147 +1121,383 @@ If multiple posts exist, analyze all of them and provide the highest confidence
             logger.warning(f"⚠️  Error loading checkpoint: {e}. Finding first unprocessed row...")
             return self.find_first_unprocessed_row()
     
-    def save_checkpoint(self, row_index):
-        """Save checkpoint"""
+    async def save_checkpoint(self, row_index):
+        """Save checkpoint without blocking the event loop"""
+        await asyncio.to_thread(self._write_checkpoint, row_index)
+    
+    def _write_checkpoint(self, row_index):
+        """Write checkpoint atomically (temp file + rename) so a crash can't leave it truncated"""
         try:
             # Ensure checkpoint directory exists
             checkpoint_dir = os.path.dirname(self.checkpoint_file)
             if checkpoint_dir and not os.path.exists(checkpoint_dir):
                 os.makedirs(checkpoint_dir, exist_ok=True)
             
-            with open(self.checkpoint_file, 'w') as f:
+            tmp_file = f"{self.checkpoint_file}.tmp"
+            with open(tmp_file, 'w') as f:
                 f.write(str(row_index))
+            os.replace(tmp_file, self.checkpoint_file)
         except Exception as e:
             logger.warning(f"⚠️  Error saving checkpoint: {e}")
     
-    def update_google_sheet(self, row_index, result):
-        """Update Google Sheet with search results"""
+    def build_sheet_cells(self, row_index, result):
+        """Build the Google Sheets cell updates for a search result (written later in one batch)"""
+        # Post Exist? column
+        cells = [gspread.Cell(row_index, self.post_exist_col, result['status'])]
+        
+        # Twitter Handle column
+        handle = f"@{result['username']}" if result['username'] else ""
+        cells.append(gspread.Cell(row_index, self.twitter_handle_col, handle))
+        
+        # Confidence Score column (now stores: High, Medium, Low, None)
+        confidence = result['confidence'] if result['confidence'] is not None else "None"
+        cells.append(gspread.Cell(row_index, self.confidence_col, confidence))
+        
+        # Script Run column (Column 8) - mark as processed
+        cells.append(gspread.Cell(row_index, self.script_run_col, "true"))
+        
+        return cells
+    
+    def flush_sheet_updates(self, cells):
+        """Write accumulated cell updates to Google Sheets in a single API call
+        
+        Returns:
+            True if the cells were written (or there was nothing to write)
+        """
+        if not cells:
+            return True
         try:
-            # Update Post Exist? column
-            self.worksheet.update_cell(row_index, self.post_exist_col, result['status'])
-            
-            # Update Twitter Handle column
-            if result['username']:
-                self.worksheet.update_cell(row_index, self.twitter_handle_col, f"@{result['username']}")
-            else:
-                self.worksheet.update_cell(row_index, self.twitter_handle_col, "")
+            self.worksheet.update_cells(cells, value_input_option='USER_ENTERED')
+            if logger.isEnabledFor(logging.INFO):
+                rows = {cell.row for cell in cells}
+                logger.info("   💾 Updated %d row(s) in Google Sheets (%d cells)", len(rows), len(cells))
+            return True
+        except Exception as e:
+            logger.error("   ⚠️  Error updating Google Sheets: %s", e)
+            return False
+    
+    def start_sheets_writer(self, start_row):
+        """Start the background task that writes queued row updates to Google Sheets in bulk
+        
+        Args:
+            start_row: First row of this run (the checkpoint never moves below it)
+        """
+        self._write_queue = asyncio.Queue()
+        self._pending_cells = []  # Cells taken from the queue but not written yet
+        # Checkpoint low-water mark: rows handed to the workers stay in _unfinished_rows until
+        # their cells are written, so the checkpoint never passes a row that is in flight, failed
+        # or whose sheet write failed (see iter_rows and _checkpoint_value)
+        self._unfinished_rows = set()
+        self._scanned_row = start_row - 1  # Last row with a wallet read by iter_rows
+        self._checkpoint_saved_row = start_row  # Row stored in the checkpoint file
+        self._checkpoint_last_flush = time.monotonic()
+        self._writer_task = asyncio.create_task(self._sheets_writer())
+    
+    async def stop_sheets_writer(self):
+        """Wait for all queued row updates to be written, then stop the writer task"""
+        await self._write_queue.join()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        # Last attempt for cells kept after a failed write
+        if self._pending_cells and await asyncio.to_thread(self.flush_sheet_updates, self._pending_cells):
+            self._unfinished_rows.difference_update(cell.row for cell in self._pending_cells)
+            self._pending_cells.clear()
+        await self._flush_checkpoint()
+    
+    def _checkpoint_value(self):
+        """Row to resume from: the lowest unfinished row, or the row after the last wallet read"""
+        if self._unfinished_rows:
+            return min(self._unfinished_rows)
+        return self._scanned_row + 1
+    
+    async def _maybe_checkpoint(self):
+        """Save the checkpoint once CHECKPOINT_EVERY_ROWS rows or CHECKPOINT_INTERVAL seconds have passed"""
+        if (self._checkpoint_value() - self._checkpoint_saved_row >= self.CHECKPOINT_EVERY_ROWS
+                or time.monotonic() - self._checkpoint_last_flush >= self.CHECKPOINT_INTERVAL):
+            await self._flush_checkpoint()
+    
+    async def _flush_checkpoint(self):
+        """Save the checkpoint up to the lowest unfinished row (skipped if it hasn't moved)"""
+        checkpoint_row = self._checkpoint_value()
+        if checkpoint_row > self._checkpoint_saved_row:
+            await self.save_checkpoint(checkpoint_row)
+            self._checkpoint_saved_row = checkpoint_row
+        self._checkpoint_last_flush = time.monotonic()
+    
+    async def _sheets_writer(self):
+        """Drain queued row updates, writing every SHEETS_FLUSH_CELLS cells or SHEETS_FLUSH_INTERVAL seconds
+        
+        Cells of a failed write are kept and retried after SHEETS_FLUSH_INTERVAL; their rows
+        hold the checkpoint back until they are written.
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._pending_cells
+        taken = 0
+        deadline = None
+        retry_at = 0
+        while True:
+            timeout = max(0, deadline - loop.time()) if pending else None
+            try:
+                cells = await asyncio.wait_for(self._write_queue.get(), timeout=timeout)
+                if not pending:
+                    deadline = loop.time() + self.SHEETS_FLUSH_INTERVAL
+                pending.extend(cells)
+                taken += 1
+                if len(pending) < self.SHEETS_FLUSH_CELLS or loop.time() < retry_at:
+                    continue
+            except asyncio.TimeoutError:
+                pass
             
-            # Update Confidence Score column (now stores: High, Medium, Low, None)
-            if result['confidence'] is not None:
-                self.worksheet.update_cell(row_index, self.confidence_col, result['confidence'])
+            if await asyncio.to_thread(self.flush_sheet_updates, pending):
+                # Only rows whose cells were written count as finished
+                self._unfinished_rows.difference_update(cell.row for cell in pending)
+                pending.clear()
+                await self._maybe_checkpoint()
             else:
-                self.worksheet.update_cell(row_index, self.confidence_col, "None")
-            
-            # Update Script Run column (Column 8) - mark as processed
-            self.worksheet.update_cell(row_index, self.script_run_col, "true")
+                deadline = retry_at = loop.time() + self.SHEETS_FLUSH_INTERVAL
             
-            logger.info(f"   💾 Updated row {row_index} in Google Sheets")
+            for _ in range(taken):
+                self._write_queue.task_done()
+            taken = 0
+    
+    def start_results_writer(self):
+        """Start the background task that appends results to the JSONL results file (if enabled)"""
+        if self.results_file is None:
+            return
+        self._results_queue = asyncio.Queue()
+        self._results_task = asyncio.create_task(self._results_writer())
+    
+    async def stop_results_writer(self):
+        """Write the remaining results and close the results file"""
+        if self._results_queue is None:
+            return
+        self._results_queue.put_nowait(None)  # Sentinel: flush and exit
+        await self._results_task
+        self._results_queue = None
+    
+    def append_results(self, fh, data):
+        """Append encoded JSONL lines to the results file"""
+        try:
+            fh.write(data)
+            fh.flush()
         except Exception as e:
-            logger.error(f"   ⚠️  Error updating Google Sheets: {e}")
+            logger.warning(f"⚠️  Error writing results file: {e}")
     
-    async def process_wallet_with_semaphore(self, row_index, wallet):
-        """Process a single wallet with semaphore for rate limiting"""
-        async with self.semaphore:
-            logger.info(f"🔍 Processing wallet (Row {row_index}): {wallet[:20]}...")
-            
-            # Check wallet with GROK
-            result = await self.check_wallet(wallet)
+    async def _results_writer(self):
+        """Drain queued results, appending every RESULTS_FLUSH_LINES lines or RESULTS_FLUSH_INTERVAL seconds"""
+        loop = asyncio.get_running_loop()
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            fh = await asyncio.to_thread(open, self.results_file, 'ab')
+        except Exception as e:
+            logger.warning(f"⚠️  Could not open results file, results will not be logged: {e}")
+            self._results_queue = None
+            return
+        
+        try:
+            pending = []
+            deadline = None
+            done = False
+            while not done:
+                timeout = max(0, deadline - loop.time()) if pending else None
+                try:
+                    result = await asyncio.wait_for(self._results_queue.get(), timeout=timeout)
+                    if result is None:
+                        done = True
+                    else:
+                        if not pending:
+                            deadline = loop.time() + self.RESULTS_FLUSH_INTERVAL
+                        pending.append(_json_dumps(result) + b"\n")
+                        if len(pending) < self.RESULTS_FLUSH_LINES:
+                            continue
+                except asyncio.TimeoutError:
+                    pass
+                
+                if pending:
+                    await asyncio.to_thread(self.append_results, fh, b"".join(pending))
+                    pending = []
+        finally:
+            await asyncio.to_thread(fh.close)
+    
+    async def iter_rows(self, start_row, end_row):
+        """Yield (row_index, wallet) for unprocessed rows, reading SHEETS_READ_PAGE_ROWS rows per request
+        
+        Only the wallet and Script Run columns are fetched, and reading stops at the first
+        page without any wallet. Rows already marked as processed (e.g. after a rewound or
+        lost checkpoint) are counted in self.skipped_rows, placeholder cells (e.g. "N/A") in
+        self.invalid_rows. Yielded rows are recorded as unfinished for the checkpoint
+        (requires start_sheets_writer); skipped rows don't hold it back.
+        
+        Args:
+            start_row: First row to read (1-based)
+            end_row: Last row to read (inclusive)
+        """
+        self.skipped_rows = 0
+        self.invalid_rows = 0
+        wallet_letter = self.column_letter(self.wallet_col)
+        script_run_letter = self.column_letter(self.script_run_col)
+        
+        for page_start in range(start_row, end_row + 1, self.SHEETS_READ_PAGE_ROWS):
+            page_end = min(end_row, page_start + self.SHEETS_READ_PAGE_ROWS - 1)
+            wallet_range, script_run_range = await asyncio.to_thread(
+                self.worksheet.batch_get,
+                [f"{wallet_letter}{page_start}:{wallet_letter}{page_end}",
+                 f"{script_run_letter}{page_start}:{script_run_letter}{page_end}"],
+                major_dimension='COLUMNS'
+            )
+            wallet_values = wallet_range[0] if wallet_range else []
+            script_run_values = script_run_range[0] if script_run_range else []
+            if not any(value.strip() for value in wallet_values):
+                # An empty page means the data has ended; don't read the rest of the grid
+                break
             
+            for offset, wallet in enumerate(wallet_values):
+                row_index = page_start + offset
+                wallet = wallet.strip()
+                if not wallet:
+                    continue
+                # Only rows with a wallet move the fallback checkpoint, so wallets pasted later
+                # into empty rows of the grid are still picked up by the next run
+                self._scanned_row = row_index
+                if offset < len(script_run_values) and script_run_values[offset].strip().lower() == "true":
+                    self.skipped_rows += 1
+                    continue
+                if not is_valid_wallet(wallet):
+                    logger.warning("⚠️  Row %d: skipping %.40r, not a wallet address", row_index, wallet)
+                    self.invalid_rows += 1
+                    continue
+                self._unfinished_rows.add(row_index)
+                yield row_index, wallet
+    
+    async def _lookup_wallet(self, wallet):
+        """Check a wallet with GROK and remember clean results for duplicates later in the run"""
+        result = await self.check_wallet(wallet)
+        if result:
+            # Raw LLM transcripts aren't written anywhere; drop them so kept results stay small
+            result.pop('raw_response', None)
+            result.pop('agent1_response', None)
+        # Only cache clean lookups so failed ones are retried on the next duplicate
+        if result and not result.get('error'):
+            self._result_cache[wallet] = result
+        return result
+    
+    async def process_wallet(self, row_index, wallet):
+        """Process a single wallet (GROK requests are gated by the admission controller)"""
+        logger.info("🔍 Processing wallet (Row %d): %.20s...", row_index, wallet)
+        
+        # Reuse the result for wallets already looked up during this run
+        if wallet in self._result_cache:
+            logger.info("   ♻️  Duplicate wallet, reusing result from this run")
+            result = dict(self._result_cache[wallet])
+        else:
+            # Duplicates being looked up by another worker share that lookup instead of a second GROK call
+            lookup = self._pending_lookups.get(wallet)
+            if lookup is None:
+                lookup = asyncio.ensure_future(self._lookup_wallet(wallet))
+                self._pending_lookups[wallet] = lookup
+                lookup.add_done_callback(lambda _: self._pending_lookups.pop(wallet, None))
+            else:
+                logger.info("   ♻️  Duplicate wallet, sharing the lookup already in progress")
+            result = await lookup
             if result:
-                result['row'] = row_index
-                result['wallet'] = wallet
-                
-                # Update Google Sheet
-                self.update_google_sheet(row_index, result)
-                
-                return result
-            return None
+                result = dict(result)
+        
+        if result:
+            result['row'] = row_index
+            result['wallet'] = wallet
+            
+            # Queue the Google Sheets update for the background writer
+            await self._write_queue.put(self.build_sheet_cells(row_index, result))
+            if self._results_queue is not None:
+                self._results_queue.put_nowait(result)
+            return result
+        return None
     
-    async def process_wallets(self, limit=None, start_from=None, use_parallel=True):
-        """Process wallets from Google Sheets with optional parallel processing"""
-        # Get limit from environment or use default
-        if limit is None:
-            limit = int(os.environ.get("WALLET_LIMIT", "5"))  # Default to 5 for testing
+    async def process_wallets(self, limit=None, start_from=None, use_parallel=True, stop_event=None):
+        """Process wallets from Google Sheets with optional parallel processing
         
-        # Get all data
-        all_data = self.worksheet.get_all_values()
-        headers = all_data[0]
-        data_rows = all_data[1:]
+        Args:
+            limit: Max rows to process (0 or negative = all remaining rows)
+            start_from: Row to start from (defaults to the checkpoint)
+            use_parallel: Run max_concurrent workers instead of one
+            stop_event: Optional asyncio.Event; once set, no new wallets are started, in-flight
+                ones finish and the queued sheet updates and checkpoint are flushed
+        """
+        # Get limit from the configuration (WALLET_LIMIT)
+        if limit is None:
+            limit = self.config.wallet_limit
         
         if start_from is None:
-            start_from = self.load_checkpoint()
+            # May read the Script Run column, keep the event loop free
+            start_from = await asyncio.to_thread(self.load_checkpoint)
         
-        # Adjust for 0-based indexing (row 1 is header, row 2 is first data)
-        start_index = max(0, start_from - 2)
+        # Row 1 is header, row 2 is first data
+        start_row = max(2, start_from)
         
         # If limit is 0 or negative, process all remaining wallets
         if limit <= 0:
-            end_index = len(data_rows)
+            end_row = self.worksheet.row_count
         else:
-            end_index = min(len(data_rows), start_index + limit)
+            end_row = min(self.worksheet.row_count, start_row + limit - 1)
         
-        wallets_to_process = []
-        for i in range(start_index, end_index):
-            if i < len(data_rows):
-                wallet = data_rows[i][self.wallet_col - 1] if self.wallet_col <= len(data_rows[i]) else ""
-                if wallet and wallet.strip():
-                    wallets_to_process.append((i + 2, wallet.strip()))  # +2 because row 1 is header
-        
-        logger.info(f"🚀 Starting GROK search for {len(wallets_to_process)} wallets")
+        logger.info(f"🚀 Starting GROK search for rows {start_row}-{end_row}")
         logger.info(f"   Starting from row {start_from}")
-        logger.info(f"   Total rows in sheet: {len(data_rows)}")
+        logger.info(f"   Sheet grid size: {self.worksheet.row_count} rows")
         logger.info(f"   Parallel processing: {use_parallel} (max concurrent: {self.max_concurrent})")
         logger.info("=" * 60)
         
         results = []
         start_time = time.time()
-        processed_count = 0
         
-        if use_parallel and len(wallets_to_process) > 1:
-            # Parallel processing
-            batch_size = self.max_concurrent * 2  # Process in batches
+        # Google Sheets updates are written behind by a background task (which also checkpoints)
+        self.start_sheets_writer(start_row)
+        self.start_results_writer()
+        try:
+            # Worker pool: each worker picks the next wallet as soon as it finishes one, so there
+            # is no idle time waiting for the slowest wallet of a batch (sequential = one worker).
+            # The queue is bounded, so the producer only stays a few wallets ahead of the workers.
+            work_queue = asyncio.Queue(maxsize=self.max_concurrent * 4)
+            worker_count = self.max_concurrent if use_parallel else 1
             
-            for batch_start in range(0, len(wallets_to_process), batch_size):
-                batch = wallets_to_process[batch_start:batch_start + batch_size]
-                logger.info(f"\n📦 Processing batch {batch_start // batch_size + 1} ({len(batch)} wallets)...")
-                
-                # Create tasks for this batch
-                tasks = [
-                    self.process_wallet_with_semaphore(row_index, wallet)
-                    for row_index, wallet in batch
-                ]
-                
-                # Process batch in parallel
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Process results
-                for i, result in enumerate(batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"   ❌ Error processing wallet: {result}")
-                        continue
-                    
-                    if result:
-                        results.append(result)
-                        processed_count += 1
-                        
-                        # Save checkpoint after each successful processing
-                        self.save_checkpoint(result['row'] + 1)
-                
-                # Small delay between batches to avoid overwhelming API
-                if batch_start + batch_size < len(wallets_to_process):
-                    await asyncio.sleep(1)
-        else:
-            # Sequential processing (fallback or for single wallet)
-            for idx, (row_index, wallet) in enumerate(wallets_to_process):
-                logger.info(f"\n[{idx + 1}/{len(wallets_to_process)}] Processing wallet (Row {row_index})...")
-                
-                result = await self.process_wallet_with_semaphore(row_index, wallet)
-                
-                if result:
-                    results.append(result)
-                    processed_count += 1
-                    self.save_checkpoint(row_index + 1)
-        
+            async def worker():
+                while True:
+                    row_index, wallet = await work_queue.get()
+                    try:
+                        if stop_event is not None and stop_event.is_set():
+                            continue  # Stopping: leave queued wallets for the next run
+                        result = await self.process_wallet(row_index, wallet)
+                        if result:
+                            results.append(result)
+                    except Exception as e:
+                        logger.error("   ❌ Error processing wallet (Row %d): %s", row_index, e)
+                    finally:
+                        work_queue.task_done()
+            
+            workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+            try:
+                # Rows are read page by page, so the first wallets start while later pages load
+                async for item in self.iter_rows(start_row, end_row):
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    await work_queue.put(item)
+                await work_queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            # Flush any queued updates before returning
+            await self.stop_sheets_writer()
+            await self.stop_results_writer()
+        
+        if self.skipped_rows:
+            logger.info(f"⏭️  Skipped {self.skipped_rows} rows already marked as processed")
+        if self.invalid_rows:
+            logger.warning(f"⚠️  Skipped {self.invalid_rows} rows without a valid wallet address")
+        processed_count = len(results)
         elapsed_time = time.time() - start_time
         logger.info(f"\n✅ Completed search for {processed_count} wallets")
         logger.info(f"   Total time: {elapsed_time:.2f} seconds ({elapsed_time/60:.2f} minutes)")
@@ -698,58 +1506,74 @@ If multiple posts exist, analyze all of them and provide the highest confidence
         
         return results
 
-async def process_worksheet(worksheet_name, limit=None, shared_semaphore=None):
+async def process_worksheet(worksheet_name, limit=None, shared_admission=None, stop_event=None, config=None,
+                            spreadsheet=None):
     """Process a single worksheet
     
     Args:
         worksheet_name: Name of the worksheet to process
         limit: Optional limit on number of wallets to process
-        shared_semaphore: Optional shared semaphore for cross-worksheet concurrency control
+        shared_admission: Optional shared AdmissionController for cross-worksheet rate limiting
+        stop_event: Optional asyncio.Event that stops processing gracefully once set
+        config: Optional Config (read from the environment if not given)
+        spreadsheet: Optional shared, already opened spreadsheet (saves one Google auth per worksheet)
     """
+    if config is None:
+        config = Config.from_env()
+    
     logger.info(f"\n{'='*60}")
     logger.info(f"📊 Processing Worksheet: {worksheet_name}")
     logger.info(f"{'='*60}")
     
     try:
-        # Initialize searcher for this worksheet with shared semaphore
-        searcher = GrokWalletSearcher(worksheet_name=worksheet_name, shared_semaphore=shared_semaphore)
-        
-        # Get limit from environment (0 or negative = process all)
-        if limit is None:
-            limit = int(os.environ.get("WALLET_LIMIT", "0"))  # Default to 0 (all)
-        
-        logger.info(f"Processing limit: {limit if limit > 0 else 'ALL'} wallets")
-        
-        # Determine if we should use parallel processing
-        use_parallel = os.environ.get("USE_PARALLEL", "true").lower() == "true"
-        
-        # Process wallets
-        results = await searcher.process_wallets(limit=limit, use_parallel=use_parallel)
-        
-        # Print summary
-        logger.info(f"\n📊 SUMMARY for {worksheet_name}:")
-        logger.info("=" * 30)
-        found_count = sum(1 for r in results if r and r.get('status') == 'true')
-        no_count = sum(1 for r in results if r and r.get('status') == 'false')
-        error_count = sum(1 for r in results if r and r.get('status') == 'Error')
-        
-        logger.info(f"   Wallets searched: {len(results)}")
-        logger.info(f"   Posts found: {found_count}")
-        logger.info(f"   No posts: {no_count}")
-        logger.info(f"   Errors: {error_count}")
-        
-        # Show results with usernames
-        if found_count > 0:
-            logger.info(f"\n📋 Wallets with posts found:")
-            for result in results[:10]:  # Show first 10
-                if result and result.get('status') == 'true':
-                    logger.info(f"   Row {result['row']}: {result['wallet'][:20]}...")
-                    logger.info(f"      Username: @{result['username'] if result.get('username') else 'N/A'}")
-                    logger.info(f"      Confidence: {result['confidence'] if result.get('confidence') else 'N/A'}")
-            if found_count > 10:
-                logger.info(f"   ... and {found_count - 10} more")
-        
-        return results
+        # Initialize searcher for this worksheet with shared admission controller
+        # (Google Sheets setup is blocking I/O, so run it in a worker thread)
+        searcher = await asyncio.to_thread(
+            GrokWalletSearcher,
+            worksheet_name=worksheet_name,
+            shared_admission=shared_admission,
+            config=config,
+            spreadsheet=spreadsheet
+        )
+        async with searcher:
+            # Get limit from the configuration (0 or negative = process all)
+            if limit is None:
+                limit = config.wallet_limit
+            
+            logger.info(f"Processing limit: {limit if limit > 0 else 'ALL'} wallets")
+            
+            # Determine if we should use parallel processing
+            use_parallel = config.use_parallel
+            
+            # Process wallets
+            results = await searcher.process_wallets(limit=limit, use_parallel=use_parallel, stop_event=stop_event)
+            
+            # Print summary
+            logger.info(f"\n📊 SUMMARY for {worksheet_name}:")
+            logger.info("=" * 30)
+            status_counts = Counter(r.get('status') for r in results if r)
+            found_count = status_counts['true']
+            no_count = status_counts['false']
+            error_count = status_counts['Error']
+            
+            logger.info(f"   Wallets searched: {len(results)}")
+            logger.info(f"   Posts found: {found_count}")
+            logger.info(f"   No posts: {no_count}")
+            logger.info(f"   Errors: {error_count}")
+            
+            # Show results with usernames
+            if found_count > 0:
+                logger.info(f"\n📋 Wallets with posts found:")
+                # First 10 wallets with posts (not the found ones among the first 10 results)
+                found = (r for r in results if r and r.get('status') == 'true')
+                for result in islice(found, 10):
+                    logger.info("   Row %d: %.20s...", result['row'], result['wallet'])
+                    logger.info("      Username: @%s", result.get('username') or 'N/A')
+                    logger.info("      Confidence: %s", result.get('confidence') or 'N/A')
+                if found_count > 10:
+                    logger.info(f"   ... and {found_count - 10} more")
+            
+            return results
         
     except Exception as e:
         logger.error(f"❌ Error processing {worksheet_name}: {e}")
@@ -761,85 +1585,126 @@ async def main():
     """Main function - Railway-compatible batch job with multi-worksheet support"""
     logger.info("🤖 GROK Wallet Search via x.ai SDK")
     logger.info("=" * 50)
-    logger.info(f"Environment: {'Railway' if os.environ.get('RAILWAY_ENVIRONMENT') else 'Local'}")
+    
+    # Environment variables are parsed once and shared by every worksheet
+    config = Config.from_env()
+    logger.info(f"Environment: {'Railway' if config.railway_environment else 'Local'}")
+    
+    # Blocking I/O (Google Sheets, checkpoint and cache files) goes through asyncio.to_thread;
+    # give it a small dedicated pool so it never queues behind unrelated thread work
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(max_workers=config.io_threads, thread_name_prefix="sheets-io")
+    )
+    
+    # Ctrl-C / SIGTERM (e.g. a Railway redeploy) stops gracefully: in-flight wallets finish and the
+    # sheet updates and checkpoint are flushed. A second signal cancels immediately.
+    stop_event = asyncio.Event()
+    main_task = asyncio.current_task()
+    
+    def request_stop():
+        if stop_event.is_set():
+            main_task.cancel()
+            return
+        logger.warning("\n⏹️  Stop requested, finishing in-flight wallets (signal again to abort)...")
+        stop_event.set()
+    
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, request_stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not supported on this platform; Ctrl-C raises KeyboardInterrupt instead
     
     try:
         # Get worksheets to process
-        worksheets_to_process = os.environ.get("WORKSHEETS_TO_PROCESS", "")
-        
-        if worksheets_to_process:
+        if config.worksheets_to_process:
             # Process multiple worksheets
-            worksheet_names = [w.strip() for w in worksheets_to_process.split(",")]
+            worksheet_names = config.worksheets_to_process
             logger.info(f"Processing {len(worksheet_names)} worksheets: {', '.join(worksheet_names)}")
         else:
             # Process single worksheet (default or from WORKSHEET_NAME)
-            worksheet_name = os.environ.get("WORKSHEET_NAME", "Gigabud Holders")
-            worksheet_names = [worksheet_name]
+            worksheet_name = config.worksheet_name
+            worksheet_names = (worksheet_name,)
             logger.info(f"Processing single worksheet: {worksheet_name}")
         
         all_results = {}
         
-        # Create shared semaphore for cross-worksheet concurrency control
+        # Create shared admission controller for cross-worksheet concurrency and rate limiting
         # This ensures total concurrent requests across all worksheets don't exceed MAX_CONCURRENT_REQUESTS
-        max_concurrent = int(os.environ.get("MAX_CONCURRENT_REQUESTS", "5"))
-        shared_semaphore = asyncio.Semaphore(max_concurrent)
+        shared_admission = AdmissionController.from_config(config)
+        max_concurrent = shared_admission.max_concurrent
         logger.info(f"🔒 Shared concurrency limit: {max_concurrent} requests across all worksheets")
         
+        # Authorize and open the spreadsheet once; every worksheet reuses the same client
+        spreadsheet = await asyncio.to_thread(open_spreadsheet, config)
+        
         # Check if we should process worksheets in parallel
-        use_parallel_worksheets = os.environ.get("USE_PARALLEL", "true").lower() == "true" and len(worksheet_names) > 1
+        use_parallel_worksheets = config.use_parallel and len(worksheet_names) > 1
         
         if use_parallel_worksheets:
-            # Process worksheets in parallel with shared semaphore
-            logger.info(f"🚀 Processing {len(worksheet_names)} worksheets in parallel...")
+            # Process worksheets in parallel with shared admission controller
+            max_parallel_worksheets = config.max_parallel_worksheets or len(worksheet_names)
+            logger.info(f"🚀 Processing {len(worksheet_names)} worksheets in parallel (up to {max_parallel_worksheets} at a time)...")
             logger.info(f"   Total concurrent requests limited to {max_concurrent} across all worksheets")
-            tasks = [
-                process_worksheet(worksheet_name, shared_semaphore=shared_semaphore)
-                for worksheet_name in worksheet_names
-                if worksheet_name
-            ]
             
-            # Process all worksheets concurrently
-            worksheet_results = await asyncio.gather(*tasks, return_exceptions=True)
+            # A slot is taken before each task is created, so at most max_parallel_worksheets
+            # searchers exist at once. process_worksheet logs its own errors and returns [],
+            # so one failing worksheet does not stop the others
+            worksheet_slots = asyncio.Semaphore(max_parallel_worksheets)
+            tasks = {}
+            async with asyncio.TaskGroup() as tg:
+                for worksheet_name in worksheet_names:
+                    await worksheet_slots.acquire()
+                    if stop_event.is_set():
+                        worksheet_slots.release()
+                        break
+                    task = tg.create_task(process_worksheet(
+                        worksheet_name, shared_admission=shared_admission, stop_event=stop_event,
+                        config=config, spreadsheet=spreadsheet
+                    ))
+                    task.add_done_callback(lambda _: worksheet_slots.release())
+                    tasks[worksheet_name] = task
             
             # Map results to worksheet names
-            for i, result in enumerate(worksheet_results):
-                worksheet_name = worksheet_names[i]
-                if isinstance(result, Exception):
-                    logger.error(f"❌ Error processing {worksheet_name}: {result}")
-                    all_results[worksheet_name] = []
-                else:
-                    all_results[worksheet_name] = result
+            for worksheet_name, task in tasks.items():
+                all_results[worksheet_name] = task.result()
         else:
-            # Process worksheets sequentially (original behavior)
+            # Process worksheets sequentially (original behavior). No pause is needed between
+            # worksheets: a rate-limit cooldown is enforced by the shared admission controller
             for worksheet_name in worksheet_names:
-                if not worksheet_name:
-                    continue
-                    
-                results = await process_worksheet(worksheet_name, shared_semaphore=shared_semaphore)
+                if stop_event.is_set():
+                    break
+                results = await process_worksheet(
+                    worksheet_name, shared_admission=shared_admission, stop_event=stop_event,
+                    config=config, spreadsheet=spreadsheet
+                )
                 all_results[worksheet_name] = results
-                
-                # Small delay between worksheets
-                if worksheet_name != worksheet_names[-1]:
-                    logger.info("\n⏳ Waiting 5 seconds before next worksheet...")
-                    await asyncio.sleep(5)
         
         # Final summary
         logger.info(f"\n{'='*60}")
         logger.info("📊 FINAL SUMMARY")
         logger.info(f"{'='*60}")
         
-        total_wallets = sum(len(r) for r in all_results.values())
-        total_found = sum(sum(1 for w in r if w and w.get('status') == 'true') for r in all_results.values())
-        total_no_posts = sum(sum(1 for w in r if w and w.get('status') == 'false') for r in all_results.values())
+        total_wallets = 0
+        status_counts = Counter()
+        for results in all_results.values():
+            total_wallets += len(results)
+            status_counts += Counter(r.get('status') for r in results if r)
+        total_found = status_counts['true']
+        total_no_posts = status_counts['false']
         
         logger.info(f"   Total worksheets processed: {len(all_results)}")
         logger.info(f"   Total wallets searched: {total_wallets}")
         logger.info(f"   Total posts found: {total_found}")
         logger.info(f"   Total no posts: {total_no_posts}")
         
-        logger.info("\n✅ All jobs completed successfully")
+        if stop_event.is_set():
+            logger.warning("\n⏹️  Search interrupted by user")
+            logger.info("💾 Progress saved. Resume by running again.")
+        else:
+            logger.info("\n✅ All jobs completed successfully")
         
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logger.warning("\n⏹️  Search interrupted by user")
         logger.info("💾 Progress saved. Resume by running again.")
         raise  # Re-raise to exit with error code